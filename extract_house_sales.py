@@ -8,11 +8,142 @@
 import sys
 import os
 import re
-from bs4 import BeautifulSoup
+import codecs
 import argparse
 import json
+from collections import Counter
+from functools import lru_cache
 from datetime import datetime
 
+try:
+    # 可选依赖：安装后使用orjson在C层完成JSON序列化，否则回退到标准库json
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _has_class(class_name):
+    """生成按class名匹配的XPath谓词，语义与CSS选择器 `.class_name` 一致"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+# XPath查询表达式，经 _xpath 首次使用时编译并缓存，避免每次提取时重复解析表达式
+# 依次对应CSS选择器：span.el-descriptions-item__label、
+# span.el-descriptions-item__content（全文查找 / 标签之后的兄弟元素）
+LABEL_XPATH = f"//span[{_has_class('el-descriptions-item__label')}]"
+CONTENT_XPATH = f"//span[{_has_class('el-descriptions-item__content')}]"
+CONTENT_REL = f"./following-sibling::span[{_has_class('el-descriptions-item__content')}][1]"
+TITLE_XPATH = "string((//title)[1])"
+
+# 房屋明细表格行、单元格、单元格内容div的class
+ROW_CLASS = 'el-table__row'
+TD_CLASS = 'el-table__cell'
+CELL_CLASS = 'cell'
+
+# 房屋详情字段，顺序与表格列顺序一致
+HOUSE_FIELDS = ('房间号', '建筑面积', '申报销售单价', '是否出售', '是否抵押')
+
+# 描述区块标签 -> 基本信息字段；顺序即子串匹配时的优先级
+LABEL_MAP = {
+    '项目名称': '项目名称',
+    '房屋坐落': '房屋坐落',
+    '销售面积': '销售面积',
+    '销售许可证证载用途': '销售许可证证载用途',
+    '许可证号': '许可证号',
+}
+
+# 编码声明需出现在文档开头1024字节内（HTML规范的预扫描范围）
+CHARSET_PRESCAN_BYTES = 1024
+CHARSET_DECLARATION_RE = re.compile(rb'<meta[^>]*charset\s*=', re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _xpath(expression):
+    """编译XPath表达式并缓存；lxml在此时才导入，--help等不解析HTML的调用无需加载"""
+    from lxml import etree
+    return etree.XPath(expression)
+
+
+def _element_text(element):
+    """获取元素内的全部文本，每段文本各自去除首尾空白后拼接"""
+    # 叶子节点（绝大多数单元格）直接读取text，仅在存在子元素时才汇总子孙文本
+    if len(element) == 0:
+        return (element.text or '').strip()
+    return ''.join(text.strip() for text in element.itertext())
+
+
+def _declares_charset(head):
+    """判断文档开头是否带有BOM或<meta>编码声明"""
+    if head.startswith((codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return True
+    return CHARSET_DECLARATION_RE.search(head) is not None
+
+
+def _has_class_token(element, class_name):
+    """判断元素的class中是否包含指定的class名"""
+    return class_name in (element.get('class') or '').split()
+
+
+def _row_cells(row):
+    """
+    按列取出表格行中每个td.el-table__cell内的第一个div.cell
+
+    列数不足时返回空列表；某列缺少div.cell时对应位置为None，保证位置与列一一对应
+    """
+    tds = [td for td in row.iterchildren('td') if _has_class_token(td, TD_CLASS)]
+    if len(tds) < len(HOUSE_FIELDS):
+        return []
+    return [next((div for div in td.iter('div') if _has_class_token(div, CELL_CLASS)), None)
+            for td in tds[:len(HOUSE_FIELDS)]]
+
+
+def _description_pairs(tree):
+    """返回描述区块中 (标签元素, 内容元素) 的列表"""
+    labels = _xpath(LABEL_XPATH)(tree)
+    contents = _xpath(CONTENT_XPATH)(tree)
+    # 标签与内容成对交替出现时直接按位置一一对应；
+    # 仅数量一致还不够，每个内容元素都必须紧跟在对应标签之后
+    if len(labels) == len(contents):
+        pairs = list(zip(labels, contents))
+        if all(label.getnext() is content for label, content in pairs):
+            return pairs
+    # 否则退回逐个查找对应的content元素（下一个兄弟元素）
+    pairs = []
+    for label in labels:
+        following = _xpath(CONTENT_REL)(label)
+        if following:
+            pairs.append((label, following[0]))
+    return pairs
+
+
+def _match_label(label_text):
+    """将描述标签文本映射为基本信息字段名，未识别时返回None"""
+    # 常见情况：标签与字段名一致（可能带结尾冒号），直接查表
+    key = LABEL_MAP.get(label_text.rstrip('：:'))
+    if key:
+        return key
+    # 兜底：按优先级进行子串匹配，兼容带前后缀的标签
+    for label, key in LABEL_MAP.items():
+        if label in label_text:
+            return key
+    return None
+
+
+def _house_score(sold, mortgaged):
+    """去重评分规则：已售(1) > 未售(0)；在同为未售时，抵押是(1) > 否(0)"""
+    return (1 if sold == '已售' else 0, 1 if mortgaged == '是' else 0)
+
+
+def _parse_area(area_text):
+    """将建筑面积文本（如 `89.5平方米`）解析为浮点数，无法解析时返回0"""
+    if not area_text:
+        return 0.0
+    try:
+        # 去掉平方米后直接转换，数值写法的判断交给float()
+        return float(area_text.replace('平方米', ''))
+    except ValueError:
+        return 0.0
+
 
 def sanitize_filename(raw_name, default='输出'):
     """清理文件名中的非法字符并裁剪边界空格/点"""
@@ -38,49 +169,87 @@ def extract_house_sales_info(html_file_path):
         dict: 包含提取到的房屋销售信息
     """
     try:
-        # 读取HTML文件
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
+        # 延迟导入lxml，仅在实际解析HTML时加载
+        from lxml import etree
         
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # 提取房屋详细信息
+        # 按列存储：每个字段一个列表，同一下标对应同一套房屋；输出JSON时再组装为dict
+        rooms, areas, prices, sold_flags, mortgage_flags = columns = ([], [], [], [], [])
+        # 房间号 -> 所在下标，用于按房间号去重
+        room_index = {}
         
-        # 提取基本信息
+        # 以二进制方式流式解析HTML，逐个处理表格行，
+        # 处理完的行立即释放，峰值内存不再随房屋数量增长
+        with open(html_file_path, 'rb') as f:
+            # 页面声明了编码（BOM或<meta charset>）时由libxml2按声明解码，否则按UTF-8解码
+            encoding = None if _declares_charset(f.read(CHARSET_PRESCAN_BYTES)) else 'utf-8'
+            f.seek(0)
+            context = etree.iterparse(f, events=('end',), tag='tr', html=True, encoding=encoding)
+            try:
+                for _, row in context:
+                    if not _has_class_token(row, ROW_CLASS):
+                        continue
+                
+                    # 取出各列的div.cell，按位置对应：房间号、建筑面积、申报销售单价、是否出售、是否抵押
+                    cell_divs = _row_cells(row)
+                    if cell_divs:  # 确保有足够的列
+                        # 缺少div.cell的列记为None，输出时不包含该字段
+                        values = [None if div is None else _element_text(div) for div in cell_divs]
+                        room_number = values[0]
+                    
+                        # 只有当房间号不为空时才记录
+                        if room_number:
+                            # 按房间号进行去重：优先保留“已售”，否则在未售情况下优先保留“是否抵押=是”
+                            # 这样可以在原始HTML存在重复行时，输出更准确的JSON数据
+                            index = room_index.get(room_number)
+                            if index is None:
+                                room_index[room_number] = len(rooms)
+                                for column, value in zip(columns, values):
+                                    column.append(value)
+                            elif (_house_score(values[3], values[4])
+                                  > _house_score(sold_flags[index], mortgage_flags[index])):
+                                for column, value in zip(columns, values):
+                                    column[index] = value
+                
+                    # 释放当前行的单元格（保留class以便识别），并删除紧邻其前、已处理过的表格行；
+                    # 遇到其他元素（如展开行中的描述区块）即停止，保留其内容供后续提取基本信息
+                    del row[:]
+                    previous = row.getprevious()
+                    while (previous is not None and previous.tag == 'tr'
+                           and _has_class_token(previous, ROW_CLASS)):
+                        row.getparent().remove(previous)
+                        previous = row.getprevious()
+            except etree.XMLSyntaxError:
+                # 空文件中没有任何元素，按无数据的页面处理；其他解析错误照常抛出
+                if context.root is not None:
+                    raise
+            # 出现无效字节说明文件实际编码与声明/默认编码不符，报错而不是输出乱码
+            if context.error_log.filter_types([etree.ErrorTypes.ERR_INVALID_ENCODING]):
+                raise ValueError(f"文件内容无法按{encoding or '页面声明的编码'}解码")
+            tree = context.root
+            if tree is None:
+                tree = etree.Element('html')
+        
+        # 提取基本信息（描述区块位于表格之外，未被释放）
         basic_info = {}
         
         # 提取房屋坐落信息
         # 更新选择器以匹配实际的HTML结构
-        label_elements = soup.find_all('span', class_=lambda x: x and 'el-descriptions-item__label' in x)
-        
-        for label in label_elements:
-            label_text = label.get_text(strip=True)
-            # 查找对应的content元素（下一个兄弟元素）
-            content_element = label.find_next_sibling('span', class_=lambda x: x and 'el-descriptions-item__content' in x)
-            
-            if content_element:
-                content_text = content_element.get_text(strip=True)
-                
-                if '项目名称' in label_text:
-                    basic_info['项目名称'] = content_text
-                elif '房屋坐落' in label_text:
-                    basic_info['房屋坐落'] = content_text
-                elif '销售面积' in label_text:
-                    basic_info['销售面积'] = content_text
-                elif '销售许可证证载用途' in label_text:
-                    basic_info['销售许可证证载用途'] = content_text
-                elif '许可证号' in label_text:
-                    basic_info['许可证号'] = content_text
+        for label, content in _description_pairs(tree):
+            key = _match_label(_element_text(label))
+            if key:
+                basic_info[key] = _element_text(content)
         
         # 如果仍然没有找到项目名称，尝试备用方法
         if '项目名称' not in basic_info:
             # 从页面标题提取
-            title_element = soup.find('title')
-            if title_element:
-                title_text = title_element.get_text(strip=True)
-                # 尝试从标题中提取项目名称
-                if '商品房销售许可证信息' in title_text:
+            title_text = _xpath(TITLE_XPATH)(tree).strip()
+            if title_text:
+                # 尝试从标题中提取项目名称（一次扫描同时完成查找与切分）
+                before, separator, after = title_text.partition('商品房销售许可证信息')
+                if separator:
                     # 提取标题中的项目名称部分
-                    project_name = title_text.replace('商品房销售许可证信息', '').strip()
+                    project_name = (before + after).strip()
                     if project_name:
                         basic_info['项目名称'] = project_name
         
@@ -88,98 +257,17 @@ def extract_house_sales_info(html_file_path):
         export_date = datetime.now().strftime('%Y%m%d')
         basic_info['导出日期'] = export_date
 
-        # 提取房屋详细信息
-        house_details = []
-        
-        # 查找表格行
-        table_rows = soup.find_all('tr', class_='el-table__row')
-        
-        for row in table_rows:
-            cells = row.find_all('td', class_='el-table__cell')
-            if len(cells) >= 5:  # 确保有足够的列
-                house_info = {}
-                
-                # 提取房间号
-                room_cell = cells[0]
-                room_div = room_cell.find('div', class_='cell')
-                if room_div:
-                    house_info['房间号'] = room_div.get_text(strip=True)
-                
-                # 提取建筑面积
-                area_cell = cells[1]
-                area_div = area_cell.find('div', class_='cell')
-                if area_div:
-                    house_info['建筑面积'] = area_div.get_text(strip=True)
-                
-                # 提取申报销售单价
-                price_cell = cells[2]
-                price_div = price_cell.find('div', class_='cell')
-                if price_div:
-                    house_info['申报销售单价'] = price_div.get_text(strip=True)
-                
-                # 提取是否出售
-                sold_cell = cells[3]
-                sold_div = sold_cell.find('div', class_='cell')
-                if sold_div:
-                    house_info['是否出售'] = sold_div.get_text(strip=True)
-                
-                # 提取是否抵押
-                mortgage_cell = cells[4]
-                mortgage_div = mortgage_cell.find('div', class_='cell')
-                if mortgage_div:
-                    house_info['是否抵押'] = mortgage_div.get_text(strip=True)
-                
-                # 只有当房间号不为空时才添加到列表中
-                if house_info.get('房间号'):
-                    house_details.append(house_info)
-        
-        # 按房间号进行去重：优先保留“已售”，否则在未售情况下优先保留“是否抵押=是”
-        # 这样可以在原始HTML存在重复行时，输出更准确的JSON数据
-        unique_house_map = {}
-        for house in house_details:
-            room_number = house.get('房间号')
-            if not room_number:
-                continue
-            existing_house = unique_house_map.get(room_number)
-            if existing_house is None:
-                unique_house_map[room_number] = house
-            else:
-                # 评分规则：已售(1) > 未售(0)；在同为未售时，抵押是(1) > 否(0)
-                def score(h):
-                    is_sold = 1 if h.get('是否出售') == '已售' else 0
-                    is_mortgaged = 1 if h.get('是否抵押') == '是' else 0
-                    return (is_sold, is_mortgaged)
-
-                if score(house) > score(existing_house):
-                    unique_house_map[room_number] = house
-
-        # 使用去重后的列表
-        house_details = list(unique_house_map.values())
-        
-        # 统计信息
-        total_houses = len(house_details)
-        sold_houses = len([h for h in house_details if h.get('是否出售') == '已售'])
-        mortgaged_houses = len([h for h in house_details if h.get('是否抵押') == '是'])
-        
-        # 计算总面积
-        total_area = 0
-        for house in house_details:
-            area_text = house.get('建筑面积', '')
-            if area_text:
-                try:
-                    # 如果包含平方米，去掉；否则直接转换
-                    if '平方米' in area_text:
-                        area_value = float(area_text.replace('平方米', ''))
-                    else:
-                        area_value = float(area_text)
-                    total_area += area_value
-                except ValueError:
-                    pass
+        # 统计信息：逐列计算，计数在列表内部的C循环中完成
+        total_houses = len(rooms)
+        sold_houses = sold_flags.count('已售')
+        mortgaged_houses = mortgage_flags.count('是')
+        total_area = sum(map(_parse_area, areas))
         
         # 构建结果
         result = {
             '基本信息': basic_info,
-            '房屋详情': house_details,
+            '房屋详情': [{key: value for key, value in zip(HOUSE_FIELDS, record) if value is not None}
+                     for record in zip(*columns)],
             '统计信息': {
                 '总房屋数': total_houses,
                 '已售房屋数': sold_houses,
@@ -193,55 +281,69 @@ def extract_house_sales_info(html_file_path):
         return result
         
     except Exception as e:
-        print(f"提取过程中发生错误: {str(e)}")
+        print(f"提取过程中发生错误 ({html_file_path}): {str(e)}")
         return None
 
 
-def save_to_file(data, output_file):
+def _write_json(data, output_file, pretty=True):
+    """将数据写入JSON文件，pretty为False时不缩进、不加多余空格"""
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            if pretty:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            else:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+
+def save_to_file(data, output_file, pretty=True):
     """
     将提取的数据保存到文件
     
     Args:
         data (dict): 提取的数据
         output_file (str): 输出文件路径
+        pretty (bool): JSON输出是否缩进，默认缩进
     """
     try:
         # 根据文件扩展名决定输出格式
         if output_file.endswith('.json'):
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            _write_json(data, output_file, pretty)
         elif output_file.endswith('.txt'):
+            # 先在内存中拼接完整报告，再一次性写入
+            parts = ["房屋销售信息提取报告\n", "=" * 50 + "\n\n"]
+            
+            # 基本信息
+            parts.append("基本信息:\n")
+            parts.append("-" * 20 + "\n")
+            for key, value in data['基本信息'].items():
+                parts.append(f"{key}: {value}\n")
+            parts.append("\n")
+            
+            # 统计信息
+            parts.append("统计信息:\n")
+            parts.append("-" * 20 + "\n")
+            for key, value in data['统计信息'].items():
+                parts.append(f"{key}: {value}\n")
+            parts.append("\n")
+            
+            # 房屋详情
+            parts.append("房屋详情:\n")
+            parts.append("-" * 20 + "\n")
+            for i, house in enumerate(data['房屋详情'], 1):
+                parts.append(f"房屋 {i}:\n")
+                for key, value in house.items():
+                    parts.append(f"  {key}: {value}\n")
+                parts.append("\n")
+            
             with open(output_file, 'w', encoding='utf-8') as f:
-                f.write("房屋销售信息提取报告\n")
-                f.write("=" * 50 + "\n\n")
-                
-                # 基本信息
-                f.write("基本信息:\n")
-                f.write("-" * 20 + "\n")
-                for key, value in data['基本信息'].items():
-                    f.write(f"{key}: {value}\n")
-                f.write("\n")
-                
-                # 统计信息
-                f.write("统计信息:\n")
-                f.write("-" * 20 + "\n")
-                for key, value in data['统计信息'].items():
-                    f.write(f"{key}: {value}\n")
-                f.write("\n")
-                
-                # 房屋详情
-                f.write("房屋详情:\n")
-                f.write("-" * 20 + "\n")
-                for i, house in enumerate(data['房屋详情'], 1):
-                    f.write(f"房屋 {i}:\n")
-                    for key, value in house.items():
-                        f.write(f"  {key}: {value}\n")
-                    f.write("\n")
+                f.write(''.join(parts))
         else:
             # 默认输出为JSON格式
             output_file = output_file + '.json'
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            _write_json(data, output_file, pretty)
         
         print(f"数据已成功保存到: {output_file}")
         
@@ -249,45 +351,90 @@ def save_to_file(data, output_file):
         print(f"保存文件时发生错误: {str(e)}")
 
 
+def _path_key(path):
+    """返回用于判断两个路径是否指向同一文件的规范化路径"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _default_output_file(html_file, data, with_source=False):
+    """
+    按需求确定默认输出文件名：项目名称+房屋坐落+导出日期，与HTML文件同目录
+
+    with_source为True时在文件名中加入HTML文件名，用于区分同一批次中同名的输出
+    """
+    dir_name = os.path.dirname(html_file)
+    base_html_name = os.path.splitext(os.path.basename(html_file))[0]
+    project_name = (data.get('基本信息', {}).get('项目名称') or '').strip()
+    location = (data.get('基本信息', {}).get('房屋坐落') or '').strip()
+    if project_name and location:
+        filename_base = f"{project_name}_{location}"
+    elif project_name:
+        filename_base = project_name
+    elif location:
+        filename_base = location
+    else:
+        filename_base = f"{base_html_name}_销售信息"
+    if with_source and filename_base != f"{base_html_name}_销售信息":
+        filename_base = f"{filename_base}_{base_html_name}"
+    filename_base = sanitize_filename(filename_base, default=f"{base_html_name}_销售信息")
+    date_suffix = (data.get('基本信息', {}).get('导出日期')
+                   or datetime.now().strftime('%Y%m%d'))
+    return os.path.join(dir_name, f"{filename_base}_{date_suffix}.json")
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='提取HTML文件中的房屋销售信息')
-    parser.add_argument('html_file', help='HTML文件路径')
-    parser.add_argument('-o', '--output', help='输出文件路径 (可选，默认为输入文件名_销售信息.json)')
+    parser.add_argument('html_file', nargs='+', help='HTML文件路径 (可指定多个，多个文件时并行处理)')
+    parser.add_argument('-o', '--output', help='输出文件路径 (可选，默认为输入文件名_销售信息.json；仅适用于单个文件)')
+    parser.add_argument('--compact', action='store_true', help='以紧凑格式输出JSON (无缩进，适合房屋数量较多的文件)')
     
     args = parser.parse_args()
+    # 去掉重复指定的同一文件（按规范化后的路径比较），保持原有顺序，提示信息沿用首次出现的写法
+    unique_files = {}
+    for html_file in args.html_file:
+        unique_files.setdefault(_path_key(html_file), html_file)
+    html_files = list(unique_files.values())
+    
+    if args.output and len(html_files) > 1:
+        parser.error('处理多个HTML文件时不能指定 -o/--output')
     
     # 检查输入文件是否存在
-    if not os.path.exists(args.html_file):
-        print(f"错误: 文件 '{args.html_file}' 不存在")
-        sys.exit(1)
+    for html_file in html_files:
+        if not os.path.exists(html_file):
+            print(f"错误: 文件 '{html_file}' 不存在")
+            sys.exit(1)
+    
+    for html_file in html_files:
+        print(f"正在处理文件: {html_file}")
     
-    print(f"正在处理文件: {args.html_file}")
+    # 提取数据：多个文件时分发到进程池并行处理，单个文件直接在当前进程中处理
+    if len(html_files) > 1:
+        from multiprocessing import Pool
+        with Pool(min(os.cpu_count() or 1, len(html_files))) as pool:
+            results = pool.map(extract_house_sales_info, html_files)
+    else:
+        results = [extract_house_sales_info(html_files[0])]
     
-    # 提取数据
-    data = extract_house_sales_info(args.html_file)
+    # 默认输出文件名相同的文件（如同一楼盘的不同楼栋页面）在文件名中加入HTML文件名，避免互相覆盖
+    default_outputs = {html_file: _default_output_file(html_file, data)
+                       for html_file, data in zip(html_files, results) if data}
+    output_counts = Counter(_path_key(path) for path in default_outputs.values())
     
-    if data:
-        # 按需求确定默认输出文件名：项目名称+房屋坐落
+    failed = False
+    for html_file, data in zip(html_files, results):
+        print(f"处理结果: {html_file}")
+        if not data:
+            print("提取失败，请检查HTML文件格式")
+            failed = True
+            continue
+        
         if args.output:
             output_file = args.output
         else:
-            dir_name = os.path.dirname(args.html_file)
-            base_html_name = os.path.splitext(os.path.basename(args.html_file))[0]
-            project_name = (data.get('基本信息', {}).get('项目名称') or '').strip()
-            location = (data.get('基本信息', {}).get('房屋坐落') or '').strip()
-            if project_name and location:
-                filename_base = f"{project_name}_{location}"
-            elif project_name:
-                filename_base = project_name
-            elif location:
-                filename_base = location
-            else:
-                filename_base = f"{base_html_name}_销售信息"
-            filename_base = sanitize_filename(filename_base, default=f"{base_html_name}_销售信息")
-            date_suffix = (data.get('基本信息', {}).get('导出日期')
-                           or datetime.now().strftime('%Y%m%d'))
-            output_file = os.path.join(dir_name, f"{filename_base}_{date_suffix}.json")
+            output_file = default_outputs[html_file]
+            if output_counts[_path_key(output_file)] > 1:
+                output_file = _default_output_file(html_file, data, with_source=True)
 
         print(f"成功提取到 {data['统计信息']['总房屋数']} 套房屋信息")
         print(f"已售房屋: {data['统计信息']['已售房屋数']} 套")
@@ -295,9 +442,9 @@ def main():
         print(f"抵押房屋: {data['统计信息']['抵押房屋数']} 套")
         
         # 保存数据
-        save_to_file(data, output_file)
-    else:
-        print("提取失败，请检查HTML文件格式")
+        save_to_file(data, output_file, pretty=not args.compact)
+    
+    if failed:
         sys.exit(1)
 
 